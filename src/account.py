@@ -7,7 +7,9 @@
 """
 
 
-from database import DatabaseManager
+from database import DatabaseManager, Account
+from audit import AuditLog
+from throttle import LoginThrottle, default_source
 from getpass import getpass
 import string
 import sys
@@ -34,6 +36,10 @@ class LoginCancelled(Exception):
     pass
 
 
+class LoginThrottledError(LoginError):
+    pass
+
+
 # Print an error message.
 def print_error(msg: object) -> None:
     """Prints an error message to the console."""
@@ -46,16 +52,104 @@ def clear_console() -> None:
     print("\033[2J\033[H")
 
 
+# Check if the password meets the requirements
+def password_meets_requirements(password: str) -> bool:
+    """Checks if the user's password meets the requirements
+defined in the Microsoft Password Complexity Standards.
+    """
+
+
+    # Check if the password requirements are met
+    has_lowercase_letters: bool = False
+    has_uppercase_letters: bool = False
+    has_numbers: bool = False
+    has_symbols: bool = False
+
+
+    for letter in password:
+        # Check if the password has lower and uppercase letters.
+        if letter in string.ascii_lowercase:
+            has_lowercase_letters = True
+
+        elif letter in string.ascii_uppercase:
+            has_uppercase_letters = True
+
+        elif letter in string.digits:
+            has_numbers = True
+
+        elif letter in string.punctuation:
+            has_symbols = True
+
+    
+    return (has_lowercase_letters and \
+            has_uppercase_letters and \
+            has_numbers and \
+            has_symbols) and \
+            len(password) >= 8
+
+
 class AccountManager:
-    def __init__(self, db_manager: DatabaseManager, break_upon_error: bool = False) -> None:
+    def __init__(self, db_manager: DatabaseManager, break_upon_error: bool = False, audit_log: AuditLog | None = None,
+                 throttle: LoginThrottle | None = None, source: str | None = None, realm: str = "") -> None:
         # The main database manager
         self.db_manager: DatabaseManager = db_manager
         self.break_upon_error: bool = break_upon_error
 
 
+        # Records logins, registrations and list access (if provided).
+        self.audit_log: AuditLog | None = audit_log
+
+
+        # Stops repeated failed logins before they reach the database (if provided).
+        self.throttle: LoginThrottle | None = throttle
+        self.source: str = source if source is not None else default_source()
+
+
+        # The login realm this manager belongs to ("" for the default database).
+        # Keeps the audit log and throttling apart when several realms share them.
+        self.realm: str = realm
+
+
         self.current_account: str = ""
 
 
+    # Record an event in the audit log.
+    def __audit__(self, event: str, **details: object) -> None:
+        if self.audit_log is None:
+            return
+
+
+        if self.realm:
+            details["realm"] = self.realm
+
+        self.audit_log.record(event, **details)
+
+
+    # Get the name a username is throttled under.
+    def __throttle_key__(self, username: str | None) -> str | tuple[str, str] | None:
+        """Returns (realm, username) inside a realm, so usernames in different realms can never share a bucket."""
+
+        return (self.realm, username) if self.realm and username is not None else username
+
+
+    # Stop the login if there have been too many failed attempts.
+    def __check_throttle__(self, username: str | None) -> None:
+        if self.throttle is None or self.throttle.allow(self.__throttle_key__(username), self.source):
+            return
+
+
+        retry_after: float = self.throttle.retry_after(self.__throttle_key__(username), self.source)
+
+        self.__audit__("login_throttled", username=username, source=self.source)
+        raise LoginThrottledError(f"Too many failed login attempts. Please try again in {max(1, round(retry_after))} seconds.")
+
+
+    # Use up an attempt after a failed login.
+    def __record_failure__(self, username: str) -> None:
+        if self.throttle is not None:
+            self.throttle.record_failure(self.__throttle_key__(username), self.source)
+
+
     # Check if the user is logged in.
     def is_logged_in(self) -> bool:
         """Checks if the user is logged in by reading through the database and seeing if the current username exists."""
@@ -64,50 +158,17 @@ class AccountManager:
             return False
 
 
-        # Check if the user is logged in.
-        for account in self.db_manager.read().split("\n"):
-            # Get the username and check if there is a match.
-            if self.current_account == account.split(",")[0].strip():
-                return True
-        
-
-        return False
+        # Check if the user is logged in by looking up the current username.
+        return self.db_manager.find_account(self.current_account) is not None
 
 
     # Check if the password meets the requirements
-    def password_meets_requirements(self, password: str) -> None:
+    def password_meets_requirements(self, password: str) -> bool:
         """Checks if the user's password meets the requirements
 defined in the Microsoft Password Complexity Standards.
         """
 
-
-        # Check if the password requirements are met
-        has_lowercase_letters: bool = False
-        has_uppercase_letters: bool = False
-        has_numbers: bool = False
-        has_symbols: bool = False
-
-
-        for letter in password:
-            # Check if the password has lower and uppercase letters.
-            if letter in string.ascii_lowercase:
-                has_lowercase_letters = True
-
-            elif letter in string.ascii_uppercase:
-                has_uppercase_letters = True
-
-            elif letter in string.digits:
-                has_numbers = True
-
-            elif letter in string.punctuation:
-                has_symbols = True
-
-        
-        return (has_lowercase_letters and \
-                has_uppercase_letters and \
-                has_numbers and \
-                has_symbols) and \
-                len(password) >= 8
+        return password_meets_requirements(password)
 
 
     # Handle the account registration process.
@@ -121,23 +182,6 @@ defined in the Microsoft Password Complexity Standards.
 
         while running:
             try:
-                # Container for the list of accounts
-                account_list: list[dict] = []
-
-
-                # Read from the database if it exists and isn't empty
-                if not self.db_manager.is_database_empty_or_nonexistent():
-                    for account in self.db_manager.read().split("\n"):
-                        # Get the usernames and password from every account
-                        try:
-                            account_list.append({
-                                "username": account.split(",")[0].strip(),
-                                "password": account.split(",")[1].strip()
-                            })
-                        except:
-                            continue
-
-                
                 # Prompt the user to enter a username
                 # for the account.
                 username: str = input("Enter a username for the account: ").strip()
@@ -148,17 +192,10 @@ defined in the Microsoft Password Complexity Standards.
                     raise InvalidCredentialsError("Please enter a username.\n")
 
 
-                # Check if the username is available.
+                # Check if the username is available, only reading the shard it belongs in.
                 # Restart if the username isn't.
                 if not self.db_manager.is_database_empty_or_nonexistent():
-                    username_available: bool = True
-
-                    for account in account_list:
-                        if username == account.get("username"):
-                            username_available = False
-                            break
-
-                    if not username_available:
+                    if self.db_manager.find_account(username) is not None:
                         raise InvalidCredentialsError(f"The username {username} is already taken. Please choose a different one and try again.")
 
 
@@ -181,8 +218,8 @@ defined in the Microsoft Password Complexity Standards.
                     raise InvalidCredentialsError("Passwords don't match.")
                     
 
-                self.db_manager.write(self.db_manager.read() + f"\n{username},{password}")
-                self.db_manager.write(self.db_manager.read())
+                self.db_manager.add_account(username, password)
+                self.__audit__("registration", username=username)
                 break
 
             
@@ -213,43 +250,43 @@ defined in the Microsoft Password Complexity Standards.
         running: bool = True
 
 
-        while running:
-            try:
-                # Exit if the database doesn't exist
-                if not self.db_manager.path.exists():
-                    raise LoginError("The database couldn't be found inside the system.")
-                
+        # Stop if there have been too many failed attempts from here, before touching the database.
+        self.__check_throttle__(None)
 
-                # Read from the database
-                database_contents: str = self.db_manager.read()
 
+        # Exit if the database doesn't exist
+        if not self.db_manager.exists():
+            raise LoginError("The database couldn't be found inside the system.")
 
-                # Exit if the database is empty.
-                if len(database_contents) <= 0:
-                    raise LoginError("The database doesn't have any entries stored.")
-                
 
-                # Prompt the user to enter a username
-                username: str = input("Enter a username: ").strip()
+        # Exit if the database is empty.
+        if self.db_manager.is_database_empty_or_nonexistent():
+            raise LoginError("The database doesn't have any entries stored.")
 
 
-                # Check if the username is correct
-                username_matches: bool = False
+        while running:
+            try:
+                # Stop if there have been too many failed attempts from here.
+                self.__check_throttle__(None)
+
+
+                # Prompt the user to enter a username
+                username: str = input("Enter a username: ").strip()
 
 
-                for account in database_contents.split("\n"):
-                    # Get the username from the account
-                    account_username: str = account.split(",")[0]
+                # Stop if there have been too many failed attempts for this account.
+                # This only checks memory so rejected attempts never reach the database.
+                self.__check_throttle__(username)
 
 
-                    # Continue if the username matches
-                    if username == account_username:
-                        username_matches = True
-                        break
+                # Look up the account, only reading the shard it belongs in.
+                account: Account | None = self.db_manager.find_account(username)
 
 
                 # Restart if there isn't a match.
-                if not username_matches:
+                if account is None:
+                    self.__audit__("login_failure", username=username, reason="unknown_username")
+                    self.__record_failure__(username)
                     raise InvalidCredentialsError(f"An account by the username '{username}' doesn't exist.")
 
 
@@ -257,28 +294,19 @@ defined in the Microsoft Password Complexity Standards.
                 password: str = getpass("Enter password: ")
 
 
-                is_password_correct: bool = False
-
-
-                for account in database_contents.split("\n"):
-                    # Get the username from the account
-                    account_username: str = account.split(",")[0]
-                    account_password: str = account.split(",")[1]
-
-
-                    # Continue if the username matches
-                    if username == account_username and password == account_password:
-                        is_password_correct = True
-                        break
-                
-
                 # Restart if the password is incorrect
-                if not is_password_correct:
+                if password != account.password:
+                    self.__audit__("login_failure", username=username, reason="incorrect_password")
+                    self.__record_failure__(username)
                     raise InvalidCredentialsError("Incorrect password. Please try again.")
 
 
                 # Log in using the account details and exit.
                 self.current_account = username
+                self.__audit__("login_success", username=username)
+
+                if self.throttle is not None:
+                    self.throttle.record_success(self.__throttle_key__(username), self.source)
 
                 break
 
@@ -303,45 +331,31 @@ defined in the Microsoft Password Complexity Standards.
 The user needs to be logged in before viewing the list."""
 
         try:
-            # Stop if either the database doesn't exist or is empty.
-            if self.db_manager.is_database_empty_or_nonexistent():
-                raise InvalidCredentialsError("The list is currently empty.")
+            # Pin a snapshot so accounts registered while listing can't change the list halfway through.
+            with self.db_manager.snapshot() as snapshot:
+                # Stop if the database is empty.
+                if len(snapshot) <= 0:
+                    raise InvalidCredentialsError("The list is currently empty.")
 
 
-            # Stop if the user isn't logged in.
-            if not self.is_logged_in():
-                raise InvalidCredentialsError("Please log in or sign up for an account before continuing.")
+                # Stop if the user isn't logged in, checking the snapshot instead of reading the database again.
+                if snapshot.find_account(self.current_account) is None:
+                    raise InvalidCredentialsError("Please log in or sign up for an account before continuing.")
 
 
-            list_of_users: list = self.db_manager.read().split("\n")
-
-            
-            # Display a list of users without their passwords.
-            list_output: str = ""
-            index: int = 1 # The list index
+                self.__audit__("list_access", username=self.current_account, generation=snapshot.generation)
 
 
-            for account in self.db_manager.read().split("\n"):
-                try:
-                    # Get the username from the account
-                    username: str = account.split(",")[0].strip()
-
-                    # Now add the username to the list
-                    list_output += f"#{index}: {username}{"\n" if self.db_manager.read().index(account) <= len(self.db_manager.read()) - 1 else ""}"
-
-                
-                except Exception as err: # Skip if an error had occurred
-                    continue
-
-                index += 1
+                # Display a list of users without their passwords.
+                list_output: str = "".join(f"#{index}: {account.username}\n" for index, account in enumerate(snapshot, 1))
 
 
-            print(f"""List of user accounts
+                print(f"""List of user accounts
 
 --------------------------------
 
 {list_output}
-Total users = {len(list_of_users)}""")
+Total users = {len(snapshot)}""")
         
         except InvalidCredentialsError:
             raise
@@ -0,0 +1,230 @@
+# File name: audit.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Records authentication events to a log file without slowing down logging in
+"""
+
+
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+
+# What happens to new events when the buffer is full.
+OVERFLOW_POLICIES: tuple[str, ...] = ("drop_oldest", "drop_newest", "block")
+
+
+class AuditLog:
+    def __init__(self, path: Path, buffer_size: int = 4096, flush_interval: float = 1.0, flush_size: int = 256,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, overflow_policy: str = "drop_oldest") -> None:
+        # The location of the log file (JSON, one event per line)
+        self.path: Path = path
+
+
+        # Events are written once flush_size of them are waiting or flush_interval seconds have passed.
+        self.buffer_size: int = buffer_size
+        self.flush_interval: float = flush_interval
+        self.flush_size: int = flush_size
+
+
+        # The log is rotated to audit.jsonl.1, audit.jsonl.2... once it's bigger than max_bytes.
+        self.max_bytes: int = max_bytes
+        self.backup_count: int = backup_count
+
+
+        # "drop_oldest" overwrites the oldest event, "drop_newest" ignores the new one and "block" waits for space.
+        self.overflow_policy: str = overflow_policy
+
+        # The number of events lost because the buffer was full.
+        self.dropped: int = 0
+
+
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: '{overflow_policy}'.")
+
+        if buffer_size <= 0 or flush_size <= 0:
+            raise ValueError("The buffer and flush sizes must be above 0.")
+
+
+        # The ring buffer shared with the writer thread
+        self.__buffer__: deque = deque()
+        self.__condition__: threading.Condition = threading.Condition()
+        self.__writing__: bool = False
+        self.__closed__: bool = False
+
+
+        self.__file__ = None
+        self.__writer__: threading.Thread = threading.Thread(target=self.__run__, name="audit-writer", daemon=True)
+        self.__writer__.start()
+
+
+    # Add an event to the log.
+    def record(self, event: str, **details: object) -> None:
+        """Adds an event to the buffer. Nothing is written to the disk by the caller.
+
+    audit_log.record("login_success", username="alice")
+        """
+
+        entry: tuple = (time.time(), event, details)
+
+
+        with self.__condition__:
+            if self.__closed__:
+                return
+
+
+            # Make space if the buffer is full.
+            if len(self.__buffer__) >= self.buffer_size:
+                if self.overflow_policy == "drop_newest":
+                    self.dropped += 1
+                    return
+
+                if self.overflow_policy == "drop_oldest":
+                    self.__buffer__.popleft()
+                    self.dropped += 1
+
+                else:
+                    while len(self.__buffer__) >= self.buffer_size and not self.__closed__:
+                        self.__condition__.wait()
+
+                    if self.__closed__:
+                        return
+
+
+            self.__buffer__.append(entry)
+
+
+            # Wake the writer up early if there's a full batch.
+            if len(self.__buffer__) >= self.flush_size:
+                self.__condition__.notify_all()
+
+
+    # Write everything in the buffer.
+    def flush(self, timeout: float | None = None) -> bool:
+        """Waits until every buffered event has been written.
+Returns False if the timeout ran out first."""
+
+        deadline: float | None = None if timeout is None else time.monotonic() + timeout
+
+
+        with self.__condition__:
+            self.__condition__.notify_all()
+
+            while self.__buffer__ or self.__writing__:
+                remaining: float | None = None if deadline is None else deadline - time.monotonic()
+
+                if remaining is not None and remaining <= 0:
+                    return False
+
+                self.__condition__.wait(remaining)
+
+
+        return True
+
+
+    # Stop the writer.
+    def close(self) -> None:
+        """Writes every buffered event and stops the writer thread. Events recorded afterwards are ignored."""
+
+        with self.__condition__:
+            self.__closed__ = True
+            self.__condition__.notify_all()
+
+
+        self.__writer__.join()
+
+
+    # Move to a new log file once the current one is too big.
+    def __rotate__(self) -> None:
+        if self.__file__ is not None:
+            self.__file__.close()
+            self.__file__ = None
+
+
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+
+
+        # audit.jsonl.4 -> audit.jsonl.5, ..., audit.jsonl -> audit.jsonl.1
+        for index in range(self.backup_count - 1, 0, -1):
+            source: Path = self.path.with_name(f"{self.path.name}.{index}")
+
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+
+
+        if self.path.exists():
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+
+    # Write a batch of events to the log.
+    def __write_batch__(self, batch: list[tuple]) -> None:
+        lines: str = "".join(json.dumps({
+            "time": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+            "event": event,
+            **details
+        }) + "\n" for timestamp, event, details in batch)
+
+
+        # Rotate first if the batch would make the log too big.
+        if self.path.exists() and self.path.stat().st_size > 0 and self.path.stat().st_size + len(lines) > self.max_bytes:
+            self.__rotate__()
+
+
+        if self.__file__ is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.__file__ = self.path.open("a", encoding="utf-8")
+
+
+        self.__file__.write(lines)
+        self.__file__.flush()
+
+
+    # Write batches until the log is closed.
+    def __run__(self) -> None:
+        while True:
+            with self.__condition__:
+                # Wait for a full batch, the flush interval or the log being closed.
+                if len(self.__buffer__) < self.flush_size and not self.__closed__:
+                    self.__condition__.wait(self.flush_interval)
+
+
+                if not self.__buffer__:
+                    self.__condition__.notify_all()
+
+                    if self.__closed__:
+                        break
+
+                    continue
+
+
+                batch: list[tuple] = list(self.__buffer__)
+                self.__buffer__.clear()
+                self.__writing__ = True
+
+                # Let blocked callers add their events.
+                self.__condition__.notify_all()
+
+
+            try:
+                self.__write_batch__(batch)
+
+            except Exception as err: # Never take the program down because of the audit log.
+                pass
+
+            finally:
+                with self.__condition__:
+                    self.__writing__ = False
+                    self.__condition__.notify_all()
+
+
+        if self.__file__ is not None:
+            self.__file__.close()
+            self.__file__ = None
\ No newline at end of file
@@ -0,0 +1,152 @@
+# File name: benchmark.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Measures how the account database performs with a large number of accounts
+"""
+
+
+from database import DatabaseManager
+from generator import GeneratorOptions, generate
+from pathlib import Path
+from typing import Callable
+import argparse
+import random
+import shutil
+import tempfile
+import tracemalloc
+import time
+
+
+# The number of lookups timed for each storage format.
+FLAT_LOOKUPS: int = 20
+BLOCK_LOOKUPS: int = 1000
+
+
+# Measure the memory used by whatever a function returns.
+def measure_memory(load: Callable) -> tuple[object, int]:
+    """Calls the function and returns its result along with the number of bytes it kept allocated."""
+
+    tracemalloc.start()
+
+    try:
+        result: object = load()
+        size, _ = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+
+    return result, size
+
+
+# Load the accounts the same way register_account used to.
+def load_as_dicts(db_manager: DatabaseManager) -> list[dict]:
+    """Loads every account as a dictionary with two freshly split strings."""
+
+    account_list: list[dict] = []
+
+
+    for account in db_manager.read().split("\n"):
+        try:
+            account_list.append({
+                "username": account.split(",")[0].strip(),
+                "password": account.split(",")[1].strip()
+            })
+        except:
+            continue
+
+
+    return account_list
+
+
+# Time how long it takes to look up accounts.
+def measure_lookups(db_manager: DatabaseManager, usernames: list[str]) -> float:
+    """Looks up every username and returns the average time per lookup in seconds."""
+
+    started: float = time.perf_counter()
+
+    for username in usernames:
+        db_manager.find_account(username)
+
+
+    return (time.perf_counter() - started) / max(1, len(usernames))
+
+
+# Run every benchmark and print a report.
+def run(count: int, seed: int) -> None:
+    """Generates a database with the given number of accounts and prints a report."""
+
+    with tempfile.TemporaryDirectory() as folder:
+        database_path: Path = Path(folder) / "accounts.txt"
+        generate(GeneratorOptions(count, seed), database_path)
+
+        db_manager: DatabaseManager = DatabaseManager(database_path)
+
+
+        report: list[str] = [f"Accounts: {count}", ""]
+
+
+        # Memory used per account in memory.
+        started: float = time.perf_counter()
+        dict_accounts, dict_size = measure_memory(lambda: load_as_dicts(db_manager))
+        dict_time: float = time.perf_counter() - started
+
+        started = time.perf_counter()
+        record_accounts, record_size = measure_memory(lambda: list(db_manager.iter_accounts()))
+        record_time: float = time.perf_counter() - started
+
+
+        report.append("Memory per account")
+        report.append(f"  dict:    {dict_size / max(1, len(dict_accounts)):8.1f} bytes  (loaded in {dict_time:.2f}s)")
+        report.append(f"  Account: {record_size / max(1, len(record_accounts)):8.1f} bytes  (loaded in {record_time:.2f}s)")
+
+
+        # Compression ratio and lookup latency of the block format compared to the flat file.
+        rng: random.Random = random.Random(seed)
+        usernames: list[str] = [account.username for account in record_accounts]
+        del dict_accounts, record_accounts
+
+        flat_size: int = database_path.stat().st_size
+        flat_latency: float = measure_lookups(db_manager, rng.choices(usernames, k=FLAT_LOOKUPS))
+
+
+        report.append("")
+        report.append("Storage (size compared to the flat file, average lookup time)")
+        report.append(f"  {'flat:':<15} {flat_size:12d} bytes  1.000  {flat_latency * 1_000_000:10.1f} us")
+
+
+        for codec in ("zlib", "lzma"):
+            codec_path: Path = Path(folder) / codec / "accounts.txt"
+            codec_path.parent.mkdir()
+            shutil.copyfile(database_path, codec_path)
+
+
+            block_manager: DatabaseManager = DatabaseManager(codec_path, True, storage_format="blocks", codec=codec)
+            block_manager.compact()
+
+            block_size: int = block_manager.segment_path.stat().st_size
+            block_latency: float = measure_lookups(block_manager, rng.choices(usernames, k=BLOCK_LOOKUPS))
+
+
+            report.append(f"  {f'blocks ({codec}):':<15} {block_size:12d} bytes  {block_size / max(1, flat_size):.3f}  {block_latency * 1_000_000:10.1f} us")
+
+
+        print("\n".join(report))
+
+
+def main(arguments: list[str] | None = None) -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmark the account database.")
+
+    parser.add_argument("-n", "--count", type=int, default=100_000, help="the number of accounts to generate")
+    parser.add_argument("--seed", type=int, default=0, help="the seed used to generate the accounts")
+
+    args: argparse.Namespace = parser.parse_args(arguments)
+
+
+    run(args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
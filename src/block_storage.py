@@ -0,0 +1,301 @@
+# File name: block_storage.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Stores accounts inside compressed blocks with a small index for looking them up
+"""
+
+
+from pathlib import Path
+from typing import Iterator
+import bisect
+import heapq
+import lzma
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+
+# Marks the start and end of a segment file.
+MAGIC: bytes = b"GELOSBLK"
+VERSION: int = 1
+
+# The codecs accounts can be compressed with.
+CODECS: dict[str, int] = {"zlib": 0, "lzma": 1}
+
+# The uncompressed size a block is filled up to before starting a new one.
+BLOCK_SIZE: int = 16 * 1024
+
+# The number of lines sorted in memory at once when building a segment.
+SORT_RUN_SIZE: int = 500_000
+
+# Header: magic, version, codec
+HEADER: struct.Struct = struct.Struct("<8sBB")
+
+# Index entry: offset, compressed length, number of lines, length of the first username
+INDEX_ENTRY: struct.Struct = struct.Struct("<QIIH")
+
+# Footer: index offset, number of blocks, magic
+FOOTER: struct.Struct = struct.Struct("<QI8s")
+
+
+class SegmentError(Exception):
+    pass
+
+
+# Compress a block.
+def compress(data: bytes, codec: int) -> bytes:
+    return lzma.compress(data) if codec == CODECS["lzma"] else zlib.compress(data, 6)
+
+
+# Decompress a block.
+def decompress(data: bytes, codec: int) -> bytes:
+    return lzma.decompress(data) if codec == CODECS["lzma"] else zlib.decompress(data)
+
+
+# Get the username from a "username,password" line.
+def line_username(line: str) -> str:
+    return line.split(",")[0]
+
+
+class BlockSegment:
+    def __init__(self, path: Path) -> None:
+        # The location of the segment file
+        self.path: Path = path
+
+
+        # The index of every block: (first username, offset, compressed length, number of lines)
+        self.first_usernames: list[str] = []
+        self.blocks: list[tuple[int, int, int]] = []
+        self.codec: int = CODECS["zlib"]
+
+
+        # The segment stays open so the offsets in the index always match the file they were read from,
+        # even if a new segment replaces it while this one is still being used.
+        self.__file__ = path.open("rb")
+        self.__lock__: threading.Lock = threading.Lock()
+
+        try:
+            self.__load_index__()
+
+        except BaseException:
+            self.__file__.close()
+            raise
+
+
+    # Read the index from the end of the segment.
+    def __load_index__(self) -> None:
+        """Reads the header and the block index. Only the index is kept in memory, never the blocks."""
+
+        with self.__lock__:
+            segment = self.__file__
+            segment.seek(0)
+
+            magic, version, self.codec = HEADER.unpack(segment.read(HEADER.size))
+
+            if magic != MAGIC or version != VERSION:
+                raise SegmentError(f"{self.path} isn't a block segment.")
+
+
+            segment.seek(-FOOTER.size, os.SEEK_END)
+            index_offset, block_count, magic = FOOTER.unpack(segment.read(FOOTER.size))
+
+            if magic != MAGIC:
+                raise SegmentError(f"{self.path} is incomplete.")
+
+
+            segment.seek(index_offset)
+
+            for _ in range(block_count):
+                offset, length, line_count, username_length = INDEX_ENTRY.unpack(segment.read(INDEX_ENTRY.size))
+
+                self.first_usernames.append(segment.read(username_length).decode("utf-8"))
+                self.blocks.append((offset, length, line_count))
+
+
+    # Get the number of accounts inside the segment.
+    def __len__(self) -> int:
+        return sum(line_count for _, _, line_count in self.blocks)
+
+
+    # Stop using the segment.
+    def close(self) -> None:
+        self.__file__.close()
+
+
+    def __del__(self) -> None:
+        # The file isn't there if opening it failed.
+        if hasattr(self, "__file__"):
+            self.__file__.close()
+
+
+    # Read and decompress a single block.
+    def read_block(self, block: int) -> list[str]:
+        """Returns the lines stored in a block."""
+
+        offset, length, _ = self.blocks[block]
+
+
+        # The file is shared between threads, so seeking and reading must happen together.
+        with self.__lock__:
+            self.__file__.seek(offset)
+            data: bytes = self.__file__.read(length)
+
+
+        return decompress(data, self.codec).decode("utf-8").split("\n")
+
+
+    # Find the line for a username.
+    def find(self, username: str) -> str | None:
+        """Looks up a username using the index, usually decompressing a single block.
+Returns the "username,password" line or None. If the username appears more than once,
+the line that came first in the original order is returned, like a flat database."""
+
+        # Start at the last block beginning before the username, since repeats of it can cross into the blocks after.
+        block: int = max(0, bisect.bisect_left(self.first_usernames, username) - 1)
+
+
+        while block < len(self.blocks):
+            for line in self.read_block(block):
+                if line_username(line) == username:
+                    return line
+
+
+            # The username can only carry on in the next block if that block starts with it.
+            block += 1
+
+            if block >= len(self.blocks) or self.first_usernames[block] != username:
+                return None
+
+
+        return None
+
+
+    # Go through every line in order.
+    def iter_lines(self) -> Iterator[str]:
+        """Yields every line in the segment, sorted by username, one block at a time."""
+
+        for block in range(len(self.blocks)):
+            yield from self.read_block(block)
+
+
+# Sort lines by username without holding them all in memory.
+def sort_lines(lines: Iterator[str], folder: str) -> Iterator[str]:
+    """Sorts lines by username using sorted runs written to the folder, merged back together.
+Lines with the same username keep their original order."""
+
+    run_paths: list[str] = []
+    run: list[str] = []
+
+
+    # Write a sorted run to its own file.
+    def flush() -> None:
+        run.sort(key=line_username)
+        run_path: str = os.path.join(folder, f"run-{len(run_paths):06d}.txt")
+
+        with open(run_path, "w", encoding="utf-8") as run_file:
+            run_file.writelines(line + "\n" for line in run)
+
+        run_paths.append(run_path)
+        run.clear()
+
+
+    for line in lines:
+        run.append(line)
+
+        if len(run) >= SORT_RUN_SIZE:
+            flush()
+
+
+    # Don't bother with files if everything fits in a single run.
+    if not run_paths:
+        run.sort(key=line_username)
+        yield from run
+        return
+
+    if run:
+        flush()
+
+
+    run_files: list = [open(run_path, encoding="utf-8") for run_path in run_paths]
+
+    try:
+        for line in heapq.merge(*((line.rstrip("\n") for line in run_file) for run_file in run_files), key=line_username):
+            yield line
+
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+
+# Write a new segment.
+def write_segment(path: Path, lines: Iterator[str], codec: str = "zlib", block_size: int = BLOCK_SIZE) -> int:
+    """Sorts the lines by username and writes them into compressed blocks, followed by the block index.
+The segment is written to a temporary file first so readers never see a half written segment.
+Returns the number of lines written."""
+
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported codec: '{codec}'.")
+
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path: Path = path.with_name(path.name + ".tmp")
+
+    index: list[tuple[str, int, int, int]] = []
+    line_count: int = 0
+
+
+    try:
+        with tempfile.TemporaryDirectory(dir=path.parent) as folder, temporary_path.open("wb") as segment:
+            segment.write(HEADER.pack(MAGIC, VERSION, CODECS[codec]))
+
+
+            block: list[str] = []
+            block_bytes: int = 0
+
+
+            # Compress the current block and add it to the index.
+            def flush() -> None:
+                data: bytes = compress("\n".join(block).encode("utf-8"), CODECS[codec])
+
+                index.append((line_username(block[0]), segment.tell(), len(data), len(block)))
+                segment.write(data)
+
+
+            for line in sort_lines(lines, folder):
+                block.append(line)
+                block_bytes += len(line) + 1
+                line_count += 1
+
+                if block_bytes >= block_size:
+                    flush()
+                    block = []
+                    block_bytes = 0
+
+            if block:
+                flush()
+
+
+            # Write the index and the footer pointing to it.
+            index_offset: int = segment.tell()
+
+            for first_username, offset, length, block_line_count in index:
+                username: bytes = first_username.encode("utf-8")
+
+                segment.write(INDEX_ENTRY.pack(offset, length, block_line_count, len(username)))
+                segment.write(username)
+
+            segment.write(FOOTER.pack(index_offset, len(index), MAGIC))
+
+
+        os.replace(temporary_path, path)
+
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+
+
+    return line_count
\ No newline at end of file
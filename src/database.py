@@ -7,11 +7,32 @@
 """
 
 
+from block_storage import BlockSegment, write_segment, CODECS
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice
 from pathlib import Path
+from typing import Iterator
+import threading
+import queue
+import zlib
 import os
 import sys
 
 
+# The maximum number of threads used to scan shards at the same time.
+MAX_SCAN_THREADS: int = 8
+
+# The number of rows handed over from a shard scanning thread at a time.
+SCAN_BATCH_SIZE: int = 4096
+
+# The number of batches a shard scanning thread can get ahead of the reader.
+SCAN_QUEUE_SIZE: int = 4
+
+# The ways accounts can be stored.
+STORAGE_FORMATS: tuple[str, ...] = ("flat", "blocks")
+
+
 # Print an error message.
 def print_error(msg: object) -> None:
     """Prints an error message"""
@@ -19,8 +40,131 @@ def print_error(msg: object) -> None:
     sys.stderr.write("ERROR: " + str(msg) + "\n")
 
 
+# A single account stored inside the database.
+class Account:
+    # Slots avoid a __dict__ per account, which matters with millions of accounts in memory.
+    __slots__ = ("username", "password")
+
+
+    def __init__(self, username: str, password: str) -> None:
+        self.username: str = username
+        self.password: str = password
+
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Account):
+            return NotImplemented
+
+        return self.username == other.username and self.password == other.password
+
+
+    def __repr__(self) -> str:
+        return f"Account(username={self.username!r})"
+
+
+# Split a line from the database into a username and password.
+def parse_account_line(line: str) -> Account | None:
+    """Parses a "username,password" line from the database.
+Returns None if the line is malformed."""
+
+    fields: list[str] = line.split(",")
+
+
+    # Skip lines without a password or a username.
+    if len(fields) < 2 or len(fields[0].strip()) <= 0:
+        return None
+
+
+    return Account(fields[0].strip(), fields[1].strip())
+
+
+# Estimate the memory used by an account.
+def account_size(account: Account) -> int:
+    """Returns roughly how many bytes an account uses, including its strings and its place in a snapshot."""
+
+    return sys.getsizeof(account) + sys.getsizeof(account.username) + sys.getsizeof(account.password) + 8
+
+
+# An unchanging view of the database at one point in time.
+class Snapshot:
+    def __init__(self, generation: int, accounts: list[Account], stamps: tuple, size: int | None = None, length: int | None = None) -> None:
+        # The version of the database this snapshot was taken from
+        self.generation: int = generation
+
+        # Every account at the time, in shard order with newly added ones at the end.
+        # Later snapshots share the list and only ever append to it, so a snapshot stops at its own length.
+        self.accounts: list[Account] = accounts
+        self.length: int = length if length is not None else len(accounts)
+
+        # The (modified time, size) of every shard file, used to notice changes.
+        self.stamps: tuple = stamps
+
+        # The number of readers currently using this snapshot
+        self.pins: int = 0
+
+        # Roughly how many bytes the snapshot uses
+        self.size: int = size if size is not None else sys.getsizeof(accounts) + sum(account_size(account) for account in accounts)
+
+
+    def __iter__(self) -> Iterator[Account]:
+        return islice(self.accounts, self.length)
+
+
+    def __len__(self) -> int:
+        return self.length
+
+
+    # Find an account by its username.
+    def find_account(self, username: str) -> Account | None:
+        """Looks for an account inside the snapshot without reading the database."""
+
+        for account in self:
+            if account.username == username:
+                return account
+
+
+        return None
+
+
+# Get the modified time and size of a file.
+def file_stamp(path: Path) -> tuple[int, int] | None:
+    """Returns the modified time and size of a file, or None if it doesn't exist."""
+
+    try:
+        stat: os.stat_result = path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    except FileNotFoundError:
+        return None
+
+
+# Work out which shard a username belongs to.
+def shard_index(username: str, shard_count: int) -> int:
+    """Returns the shard a username is stored in.
+Uses CRC-32 so the result stays the same between runs (unlike hash())."""
+
+    if shard_count <= 0:
+        return 0
+
+
+    return zlib.crc32(username.strip().encode("utf-8")) % shard_count
+
+
+# Get the location of every shard file.
+def shard_paths(database_path: Path, shard_count: int) -> list[Path]:
+    """Returns the shard files for a database, e.g. data/accounts.000.txt, data/accounts.001.txt...
+An unsharded database (shard_count of 0) is a single file."""
+
+    if shard_count <= 0:
+        return [database_path]
+
+
+    return [database_path.with_name(f"{database_path.stem}.{index:03d}{database_path.suffix}") for index in range(shard_count)]
+
+
 class DatabaseManager:
-    def __init__(self, database_path: Path, break_upon_error: bool = False) -> None:
+    def __init__(self, database_path: Path, break_upon_error: bool = False, shard_count: int = 0,
+                 storage_format: str = "flat", codec: str = "zlib") -> None:
         # The location leading to the database
         self.path: Path = database_path
 
@@ -29,11 +173,110 @@ class DatabaseManager:
         self.break_upon_error = break_upon_error
 
 
+        # Split the accounts across multiple files if the shard count is above 0.
+        self.shard_count: int = shard_count
+        self.shard_paths: list[Path] = shard_paths(database_path, shard_count)
+
+
+        # With the "blocks" format, most accounts live in a compressed segment (e.g. data/accounts.blk)
+        # and newly registered ones are added to the flat file until the database is compacted.
+        self.storage_format: str = storage_format
+        self.codec: str = codec
+        self.segment_path: Path = database_path.with_suffix(".blk")
+
+        self.__segment__: BlockSegment | None = None
+        self.__segment_stamp__: tuple[int, int] | None = None
+
+
+        if storage_format not in STORAGE_FORMATS:
+            raise ValueError(f"Unsupported storage format: '{storage_format}'.")
+
+        if storage_format == "blocks" and shard_count > 0:
+            raise ValueError("The blocks format can't be sharded.")
+
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec: '{codec}'.")
+
+
+        # Writes only lock the shard they are writing to.
+        self.__shard_locks__: list[threading.Lock] = [threading.Lock() for _ in self.shard_paths]
+
+
+        # Readers pin a snapshot and iterate it without locking while writers publish new ones.
+        self.__snapshot_lock__: threading.Lock = threading.Lock()
+        self.__current_snapshot__: Snapshot | None = None
+        self.__generation__: int = 0
+
+        # Every snapshot which is current or still pinned, by generation.
+        self.__live_snapshots__: dict[int, Snapshot] = {}
+
+
+    # Get every file the database is stored in.
+    def __stamp_paths__(self) -> list[Path]:
+        return self.shard_paths + [self.segment_path] if self.storage_format == "blocks" else self.shard_paths
+
+
+    # Check if the database exists
+    def exists(self) -> bool:
+        """Checks if any of the database files exist."""
+
+        return any(path.exists() for path in self.__stamp_paths__())
+
+
     # Check if the database is empty or non-existant
     def is_database_empty_or_nonexistent(self) -> bool:
-        """Checks if the database is non-existant or empty."""
+        """Checks if the database is non-existant or empty.
+Only the file sizes are looked at, so the accounts themselves are never read."""
+
+        # Check the compressed segment first.
+        segment: BlockSegment | None = self.__get_segment__()
+
+        if segment is not None and len(segment) > 0:
+            return False
+
+
+        return not any((file_stamp(path) or (0, 0))[1] > 0 for path in self.shard_paths)
+
+
+    # Get the compressed segment.
+    def __get_segment__(self) -> BlockSegment | None:
+        """Returns the compressed segment, reloading its index if the file has changed.
+Returns None if the database doesn't use the blocks format or there isn't a segment yet."""
+
+        if self.storage_format != "blocks":
+            return None
+
+
+        stamp: tuple[int, int] | None = file_stamp(self.segment_path)
+
+        if stamp != self.__segment_stamp__:
+            self.__segment__ = BlockSegment(self.segment_path) if stamp is not None else None
+            self.__segment_stamp__ = stamp
+
+
+        return self.__segment__
+
+
+    # Read the accounts from the compressed segment.
+    def __iter_segment__(self) -> Iterator[Account]:
+        segment: BlockSegment | None = self.__get_segment__()
+
+        if segment is None:
+            return
+
 
-        return not self.path.exists() or len(self.read()) <= 0
+        for line in segment.iter_lines():
+            account: Account | None = parse_account_line(line)
+
+            if account is not None:
+                yield account
+
+
+    # Read the accounts from a shard.
+    def __iter_shard__(self, index: int) -> Iterator[Account]:
+        """Yields every account inside a shard, including the compressed segment with the blocks format."""
+
+        return chain(self.__iter_segment__(), self.__iter_file__(self.shard_paths[index]))
 
 
     # Read the contents from the database.
@@ -110,11 +353,451 @@ Using DatabaseManager.write() is recommended."""
                 return
 
 
+    # Read the accounts from a single file.
+    def __iter_file__(self, path: Path) -> Iterator[Account]:
+        """Yields every account inside a database file, skipping malformed lines."""
+
+        try:
+            with path.open() as database:
+                for line in database:
+                    account: Account | None = parse_account_line(line)
+
+                    if account is not None:
+                        yield account
+
+
+        except FileNotFoundError: # Do nothing if the database could not be found.
+            return
+
+
+        except Exception as err:
+            if self.break_upon_error:
+                raise
+
+
+    # Find an account inside a single file.
+    def __find_in_file__(self, path: Path, username: str) -> Account | None:
+        """Looks for a username inside a database file.
+Only the username field of each line is compared, so an Account is only built for the match."""
+
+        try:
+            with path.open() as database:
+                for line in database:
+                    # Skip most lines without splitting them.
+                    if username not in line:
+                        continue
+
+
+                    fields: list[str] = line.split(",")
+
+                    if len(fields) >= 2 and fields[0].strip() == username:
+                        return Account(username, fields[1].strip())
+
+
+        except FileNotFoundError: # Do nothing if the database could not be found.
+            return None
+
+
+        except Exception as err:
+            if self.break_upon_error:
+                raise
+
+
+        return None
+
+
+    # Read the accounts from every shard at the same time.
+    def __iter_shards__(self) -> Iterator[Account]:
+        """Scans every shard using a thread pool and yields their accounts in shard order.
+Each thread can only get a few batches ahead so memory usage stays bounded."""
+
+        stop: threading.Event = threading.Event()
+        batches: list[queue.Queue] = [queue.Queue(SCAN_QUEUE_SIZE) for _ in self.shard_paths]
+
+
+        # Hand a batch to the reader unless it has stopped reading.
+        def put(batch_queue: queue.Queue, item: object) -> bool:
+            while not stop.is_set():
+                try:
+                    batch_queue.put(item, timeout=0.1)
+                    return True
+
+                except queue.Full:
+                    continue
+
+            return False
+
+
+        # Scan a single shard.
+        def scan(path: Path, batch_queue: queue.Queue) -> None:
+            try:
+                batch: list[Account] = []
+
+                for account in self.__iter_file__(path):
+                    batch.append(account)
+
+                    if len(batch) >= SCAN_BATCH_SIZE:
+                        if not put(batch_queue, batch):
+                            return
+
+                        batch = []
+
+
+                if batch and not put(batch_queue, batch):
+                    return
+
+                put(batch_queue, None)
+
+
+            except Exception as err: # Let the reader raise the error.
+                put(batch_queue, err)
+
+
+        with ThreadPoolExecutor(min(len(self.shard_paths), MAX_SCAN_THREADS)) as executor:
+            for path, batch_queue in zip(self.shard_paths, batches):
+                executor.submit(scan, path, batch_queue)
+
+
+            try:
+                # Merge the shards in order.
+                for batch_queue in batches:
+                    while (batch := batch_queue.get()) is not None:
+                        if isinstance(batch, Exception):
+                            raise batch
+
+                        yield from batch
+
+            finally:
+                stop.set()
+
+
+    # Go through every account inside the database.
+    def iter_accounts(self) -> Iterator[Account]:
+        """Yields every account inside the database.
+Malformed lines are skipped."""
+
+        if self.shard_count <= 0:
+            return self.__iter_shard__(0)
+
+
+        return self.__iter_shards__()
+
+
+    # Find an account by its username.
+    def find_account(self, username: str) -> Account | None:
+        """Looks for an account by its username, only reading the shard it belongs in.
+With the blocks format, a single block is decompressed before checking the newly added accounts.
+Returns None if there isn't an account."""
+
+        # Accounts always have a username (e.g. nobody is logged in).
+        if len(username.strip()) <= 0:
+            return None
+
+
+        segment: BlockSegment | None = self.__get_segment__()
+
+        if segment is not None:
+            line: str | None = segment.find(username)
+
+            if line is not None:
+                return parse_account_line(line)
+
+
+        return self.__find_in_file__(self.shard_paths[shard_index(username, self.shard_count)], username)
+
+
+    # Add an account to the database.
+    def add_account(self, username: str, password: str) -> None:
+        """Adds an account to the end of the shard it belongs in.
+Only that shard is locked while writing. A new snapshot containing the account is published afterwards."""
+
+        index: int = shard_index(username, self.shard_count)
+        path: Path = self.shard_paths[index]
+
+
+        with self.__shard_locks__[index]:
+            try:
+                # Create the folders containing the file.
+                path.parent.mkdir(parents=True, exist_ok=True)
+
+
+                # Don't start the file with a new line.
+                old_stamp: tuple[int, int] | None = file_stamp(path)
+                separator: str = "\n" if old_stamp is not None and old_stamp[1] > 0 else ""
+
+                with path.open("a") as database:
+                    database.write(f"{separator}{username},{password}")
+
+
+                new_stamp: tuple[int, int] | None = file_stamp(path)
+
+
+            except Exception as err:
+                if self.break_upon_error:
+                    raise
+
+                return
+
+
+        self.__publish_account__(index, old_stamp, new_stamp, Account(username, password))
+
+
+    # Load a new snapshot from the database files.
+    def __load_snapshot__(self) -> Snapshot:
+        """Reads every shard (while holding its lock) and publishes the result as the current snapshot.
+Must be called while holding the snapshot lock."""
+
+        # Read a single shard along with its stamp.
+        def load(index: int) -> tuple[list[Account], tuple[int, int] | None]:
+            with self.__shard_locks__[index]:
+                return list(self.__iter_shard__(index)), file_stamp(self.shard_paths[index])
+
+
+        indexes: range = range(len(self.shard_paths))
+
+        if len(indexes) > 1:
+            with ThreadPoolExecutor(min(len(indexes), MAX_SCAN_THREADS)) as executor:
+                shards: list = list(executor.map(load, indexes))
+        else:
+            shards = [load(0)]
+
+
+        accounts: list[Account] = [account for shard_accounts, _ in shards for account in shard_accounts]
+        stamps: list = [stamp for _, stamp in shards]
+
+        if self.storage_format == "blocks":
+            stamps.append(self.__segment_stamp__)
+
+        self.__replace_snapshot__(Snapshot(0, accounts, tuple(stamps)))
+
+
+        return self.__current_snapshot__
+
+
+    # Make a snapshot the current one.
+    def __replace_snapshot__(self, snapshot: Snapshot | None) -> None:
+        """Publishes a new snapshot (or None to force the next reader to reload).
+The previous snapshot is reclaimed straight away unless a reader still has it pinned.
+Must be called while holding the snapshot lock."""
+
+        old_snapshot: Snapshot | None = self.__current_snapshot__
+        self.__generation__ += 1
+
+
+        if snapshot is not None:
+            snapshot.generation = self.__generation__
+            self.__live_snapshots__[snapshot.generation] = snapshot
+
+        self.__current_snapshot__ = snapshot
+
+
+        if old_snapshot is not None and old_snapshot.pins <= 0:
+            self.__live_snapshots__.pop(old_snapshot.generation, None)
+
+
+    # Publish a snapshot with a newly added account.
+    def __publish_account__(self, index: int, old_stamp: tuple[int, int] | None, new_stamp: tuple[int, int] | None, account: Account) -> None:
+        """Publishes a snapshot containing an account that was just appended to a shard.
+If the current snapshot doesn't line up with the shard before the append, it's dropped and the next reader reloads instead."""
+
+        with self.__snapshot_lock__:
+            snapshot: Snapshot | None = self.__current_snapshot__
+
+            if snapshot is None:
+                return
+
+
+            stamp: tuple[int, int] | None = snapshot.stamps[index]
+
+
+            # The snapshot was loaded after the account was written.
+            if stamp is not None and new_stamp is not None and stamp[1] >= new_stamp[1]:
+                return
+
+
+            # The snapshot is missing other changes too.
+            if stamp != old_stamp:
+                self.__replace_snapshot__(None)
+                return
+
+
+            stamps: list = list(snapshot.stamps)
+            stamps[index] = new_stamp
+
+
+            # The current snapshot always reaches the end of its list, so appending leaves older snapshots unchanged.
+            snapshot.accounts.append(account)
+
+            self.__replace_snapshot__(Snapshot(0, snapshot.accounts, tuple(stamps), snapshot.size + account_size(account), snapshot.length + 1))
+
+
+    # Stop using a snapshot.
+    def __unpin__(self, snapshot: Snapshot) -> None:
+        with self.__snapshot_lock__:
+            snapshot.pins -= 1
+
+
+            # Reclaim the snapshot if nothing is using it anymore.
+            if snapshot.pins <= 0 and snapshot is not self.__current_snapshot__:
+                self.__live_snapshots__.pop(snapshot.generation, None)
+
+
+    # Use an unchanging view of the database.
+    @contextmanager
+    def snapshot(self) -> Iterator[Snapshot]:
+        """Pins the current snapshot of the database for as long as the block runs.
+The snapshot never changes, so it can be iterated without locking while accounts are being added.
+
+    with db_manager.snapshot() as snapshot:
+        for account in snapshot:
+            ...
+        """
+
+        with self.__snapshot_lock__:
+            snapshot: Snapshot | None = self.__current_snapshot__
+
+
+            # Reload if there isn't a snapshot or the files were changed by something else.
+            if snapshot is None or snapshot.stamps != tuple(file_stamp(path) for path in self.__stamp_paths__()):
+                snapshot = self.__load_snapshot__()
+
+            snapshot.pins += 1
+
+
+        try:
+            yield snapshot
+
+        finally:
+            self.__unpin__(snapshot)
+
+
+    # List the generations still held in memory.
+    def live_generations(self) -> list[int]:
+        """Returns the generation of every snapshot which is current or still pinned by a reader."""
+
+        with self.__snapshot_lock__:
+            return sorted(self.__live_snapshots__)
+
+
+    # Estimate the memory kept by the database manager.
+    def memory_usage(self) -> int:
+        """Returns roughly how many bytes are kept in memory by the current snapshot and the compressed segment's index."""
+
+        size: int = 0
+
+
+        with self.__snapshot_lock__:
+            if self.__current_snapshot__ is not None:
+                size += self.__current_snapshot__.size
+
+
+        if self.__segment__ is not None:
+            size += sum(sys.getsizeof(username) + 64 for username in self.__segment__.first_usernames)
+
+
+        return size
+
+
     def read(self) -> str: # Provide a more friendlier approach to reading from the database.
         """Reads the contents from the database."""
-        return self.__read__(self.path, self.break_upon_error)
+
+        if self.storage_format == "blocks":
+            segment: BlockSegment | None = self.__get_segment__()
+            segment_contents: str = "\n".join(segment.iter_lines()) if segment is not None else ""
+
+            return "\n".join(contents for contents in (segment_contents, self.__read__(self.path, self.break_upon_error)) if contents)
+
+
+        if self.shard_count <= 0:
+            return self.__read__(self.path, self.break_upon_error)
+
+
+        # Join every shard that isn't empty.
+        return "\n".join(contents for contents in (self.__read__(path, self.break_upon_error) for path in self.shard_paths) if contents)
 
 
     def write(self, contents: str) -> None: # Do the same thing but for writing to the database.
         """Writes new contents from the database."""
-        self.__write__(self.path, contents, self.break_upon_error)
\ No newline at end of file
+
+        if self.storage_format == "blocks":
+            with self.__shard_locks__[0]:
+                # Everything goes into a new segment.
+                accounts: Iterator[Account | None] = (parse_account_line(line) for line in contents.strip().split("\n"))
+
+                # Only remove the flat file once its accounts are safely in the segment.
+                if self.__write_segment__(f"{account.username},{account.password}" for account in accounts if account is not None):
+                    self.path.unlink(missing_ok=True)
+
+            self.__invalidate_snapshot__()
+            return
+
+
+        if self.shard_count <= 0:
+            with self.__shard_locks__[0]:
+                self.__write__(self.path, contents, self.break_upon_error)
+
+            self.__invalidate_snapshot__()
+            return
+
+
+        # Split the lines into their shards.
+        shards: list[list[str]] = [[] for _ in self.shard_paths]
+
+        for line in contents.strip().split("\n"):
+            if len(line.strip()) > 0:
+                shards[shard_index(line.split(",")[0], self.shard_count)].append(line)
+
+
+        # Only shards which have changed get written to.
+        for index, lines in enumerate(shards):
+            with self.__shard_locks__[index]:
+                self.__write__(self.shard_paths[index], "\n".join(lines), self.break_upon_error)
+
+
+        self.__invalidate_snapshot__()
+
+
+    # Force the next reader to reload.
+    def __invalidate_snapshot__(self) -> None:
+        with self.__snapshot_lock__:
+            self.__replace_snapshot__(None)
+
+
+    # Write a new compressed segment.
+    def __write_segment__(self, lines: Iterator[str]) -> bool:
+        """Writes a new compressed segment. Returns False if it couldn't be written, leaving the old one in place."""
+
+        try:
+            write_segment(self.segment_path, lines, self.codec)
+            return True
+
+        except Exception as err:
+            if self.break_upon_error:
+                raise
+
+            return False
+
+
+    # Move the newly added accounts into the compressed segment.
+    def compact(self) -> None:
+        """Merges the accounts added to the flat file into the compressed segment in one streaming pass, then removes the flat file.
+Also converts an existing flat database into the blocks format. Malformed lines are dropped."""
+
+        if self.storage_format != "blocks":
+            raise ValueError("Only the blocks format can be compacted.")
+
+
+        with self.__shard_locks__[0]:
+            segment: BlockSegment | None = self.__get_segment__()
+            old_lines: Iterator[str] = segment.iter_lines() if segment is not None else iter(())
+
+
+            # Normalise the new lines the same way they are read.
+            new_lines: Iterator[str] = (f"{account.username},{account.password}" for account in self.__iter_file__(self.path))
+
+            # Only remove the flat file once its accounts are safely in the segment.
+            if self.__write_segment__(chain(old_lines, new_lines)):
+                self.path.unlink(missing_ok=True)
+
+
+        self.__invalidate_snapshot__()
\ No newline at end of file
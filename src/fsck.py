@@ -0,0 +1,348 @@
+# File name: fsck.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Checks the account database for malformed lines, duplicate usernames and weak passwords
+"""
+
+
+from account import password_meets_requirements
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from itertools import islice
+from typing import Iterator
+import argparse
+import hashlib
+import heapq
+import os
+import sys
+
+
+# The smallest and largest parts of the file given to a worker.
+# Large files are split into more chunks than there are workers so each one's memory stays bounded.
+MIN_CHUNK_SIZE: int = 4 * 1024 * 1024
+MAX_CHUNK_SIZE: int = 16 * 1024 * 1024
+
+# The number of problems listed in a report (the rest are only counted).
+MAX_ISSUES: int = 1000
+
+
+# Every kind of problem that can be found.
+ISSUE_KINDS: tuple[str, ...] = ("blank_line", "missing_password", "empty_username", "extra_fields",
+                                "invalid_encoding", "duplicate_username", "weak_password")
+
+
+class Report:
+    def __init__(self) -> None:
+        # The number of lines checked
+        self.line_count: int = 0
+
+        # Problems found: (line number, kind, the line or username)
+        self.issues: list[tuple[int, str, str]] = []
+        self.counts: dict[str, int] = {kind: 0 for kind in ISSUE_KINDS}
+
+
+    # Record a problem.
+    def add_issue(self, line_number: int, kind: str, text: str) -> None:
+        """Counts a problem, only keeping the details of the first MAX_ISSUES."""
+
+        self.counts[kind] += 1
+
+        if len(self.issues) < MAX_ISSUES:
+            self.issues.append((line_number, kind, text))
+
+
+    # Check if nothing is wrong with the database.
+    def is_clean(self) -> bool:
+        return not any(self.counts.values())
+
+
+class ChunkResult(Report):
+    def __init__(self) -> None:
+        super().__init__()
+
+        # The line each username (as a digest) was first seen on, and the usernames seen again inside the chunk.
+        # Line numbers are counted from the start of the chunk.
+        self.first_seen: dict[int, int] = {}
+        self.duplicates: list[tuple[int, int]] = []
+
+
+# Turn a username into a small number for finding duplicates.
+def username_digest(username: str) -> int:
+    """Returns a 64-bit digest of a username, so duplicates can be found without keeping every username in memory.
+The digests still take memory for every account, just less than the usernames would."""
+
+    return int.from_bytes(hashlib.blake2b(username.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# Check a single line.
+def check_line(line: str) -> tuple[str | None, str | None, str | None]:
+    """Checks a line from the database.
+Returns the kind of problem (or None), the username and the password."""
+
+    if len(line.strip()) <= 0:
+        return ("blank_line", None, None)
+
+
+    fields: list[str] = line.split(",")
+
+    if len(fields) < 2:
+        return ("missing_password", None, None)
+
+    if len(fields[0].strip()) <= 0:
+        return ("empty_username", None, None)
+
+
+    username: str = fields[0].strip()
+    password: str = fields[1].strip()
+
+    if len(fields) > 2:
+        return ("extra_fields", username, password)
+
+    if not password_meets_requirements(password):
+        return ("weak_password", username, password)
+
+
+    return (None, username, password)
+
+
+# Split the file into chunks that start at the beginning of a line.
+def find_chunks(path: Path, chunk_count: int) -> list[tuple[int, int]]:
+    """Splits the file into roughly equal byte ranges, moving each boundary forward to just after a new line."""
+
+    size: int = path.stat().st_size
+    chunk_size: int = min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, -(-size // max(1, chunk_count))))
+    boundaries: list[int] = [0]
+
+
+    with path.open("rb") as database:
+        while boundaries[-1] < size:
+            database.seek(boundaries[-1] + chunk_size)
+            database.readline()
+
+            boundaries.append(min(size, max(database.tell(), boundaries[-1] + chunk_size)))
+
+
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:])]
+
+
+# Check every line inside a chunk.
+def check_chunk(path: Path, start: int, end: int) -> ChunkResult:
+    """Checks the lines between two byte offsets one at a time. Line numbers are counted from the start of the chunk."""
+
+    result: ChunkResult = ChunkResult()
+    line_number: int = 0
+
+
+    with path.open("rb") as database:
+        database.seek(start)
+
+        while database.tell() < end:
+            raw_line: bytes = database.readline().rstrip(b"\n")
+            line_number += 1
+
+
+            try:
+                line: str = raw_line.decode("utf-8").rstrip("\r")
+
+            except UnicodeDecodeError:
+                result.add_issue(line_number, "invalid_encoding", repr(raw_line))
+                continue
+
+
+            kind, username, _ = check_line(line)
+
+            if kind is not None:
+                result.add_issue(line_number, kind, username if username is not None else line)
+
+            if username is None:
+                continue
+
+
+            # Remember the first line each username appears on.
+            digest: int = username_digest(username)
+
+            if digest in result.first_seen:
+                result.duplicates.append((line_number, digest))
+            else:
+                result.first_seen[digest] = line_number
+
+
+    result.line_count = line_number
+
+
+    return result
+
+
+# Check the whole database.
+def check(path: Path, processes: int = 1) -> Report:
+    """Checks the database using a process for each chunk, then joins the results together.
+Duplicates are found by comparing the first line each username appears on in every chunk.
+Only the digests are compared, so two usernames sharing a digest (very unlikely) would be reported as a duplicate."""
+
+    chunks: list[tuple[int, int]] = find_chunks(path, processes * 4)
+    report: Report = Report()
+    first_seen: dict[int, int] = {}
+
+
+    # Check the chunks in separate processes unless there's only one.
+    if processes <= 1 or len(chunks) <= 1:
+        results: Iterator[ChunkResult] = (check_chunk(path, start, end) for start, end in chunks)
+    else:
+        executor: ProcessPoolExecutor = ProcessPoolExecutor(processes)
+        results = executor.map(check_chunk, [path] * len(chunks), *zip(*chunks))
+
+
+    try:
+        for result in results:
+            offset: int = report.line_count
+
+            for kind, count in result.counts.items():
+                report.counts[kind] += count
+
+
+            # Usernames first seen in this chunk might have already been seen in an earlier one.
+            earlier_duplicates: list[tuple[int, int]] = []
+
+            for digest, line_number in result.first_seen.items():
+                if digest in first_seen:
+                    earlier_duplicates.append((line_number, digest))
+                else:
+                    first_seen[digest] = offset + line_number
+
+
+            report.counts["duplicate_username"] += len(earlier_duplicates) + len(result.duplicates)
+
+
+            # List the chunk's problems in line order, so the report keeps the first MAX_ISSUES of the whole file.
+            duplicates: Iterator[tuple[int, str, str]] = ((offset + line_number, "duplicate_username", f"first seen on line {first_seen[digest]}")
+                                                         for line_number, digest in heapq.merge(earlier_duplicates, result.duplicates))
+
+            issues: Iterator[tuple[int, str, str]] = heapq.merge(((offset + line_number, kind, text) for line_number, kind, text in result.issues), duplicates)
+
+            report.issues.extend(islice(issues, max(0, MAX_ISSUES - len(report.issues))))
+
+
+            report.line_count += result.line_count
+
+    finally:
+        if processes > 1 and len(chunks) > 1:
+            executor.shutdown()
+
+
+    return report
+
+
+# Write a repaired copy of the database.
+def repair(path: Path, output_path: Path, drop_weak_passwords: bool = False) -> int:
+    """Copies the database to the output in one streaming pass, skipping malformed lines and repeated usernames.
+Lines with extra fields keep their first two. Returns the number of lines written.
+The copy is written to a temporary file first, so the output can be the database itself.
+When two usernames share a digest, the earlier line is read again so a different account is never dropped."""
+
+    # The offset of the first line kept for each username digest
+    seen: dict[int, int] = {}
+
+    # Usernames kept even though their digest belongs to a different username
+    collisions: set[str] = set()
+
+    line_count: int = 0
+    offset: int = 0
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path: Path = output_path.with_name(output_path.name + ".tmp")
+
+
+    try:
+        with path.open("rb") as database, path.open("rb") as earlier_lines, temporary_path.open("w", encoding="utf-8") as output:
+            for raw_line in database:
+                line_offset: int = offset
+                offset += len(raw_line)
+
+
+                try:
+                    kind, username, password = check_line(raw_line.decode("utf-8").rstrip("\r\n"))
+
+                except UnicodeDecodeError:
+                    continue
+
+
+                # Skip anything that can't be used to log in.
+                if username is None or (kind == "weak_password" and drop_weak_passwords):
+                    continue
+
+
+                digest: int = username_digest(username)
+
+                if digest not in seen:
+                    seen[digest] = line_offset
+
+                else:
+                    # Make sure it's really the same username before skipping it.
+                    earlier_lines.seek(seen[digest])
+
+                    if username in collisions or check_line(earlier_lines.readline().decode("utf-8").rstrip("\r\n"))[1] == username:
+                        continue
+
+                    collisions.add(username)
+
+
+                # Don't start or end the file with a new line.
+                output.write(("\n" if line_count > 0 else "") + f"{username},{password}")
+                line_count += 1
+
+
+        os.replace(temporary_path, output_path)
+
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+
+
+    return line_count
+
+
+def main(arguments: list[str] | None = None) -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Check the account database for problems.")
+
+    parser.add_argument("database", type=Path, help="the database to check, e.g. data/accounts.txt")
+    parser.add_argument("--repair", type=Path, metavar="OUTPUT", help="write a repaired copy of the database to OUTPUT")
+    parser.add_argument("--drop-weak-passwords", action="store_true", help="leave accounts with weak passwords out of the repaired copy")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="the number of worker processes")
+    parser.add_argument("--max-issues", type=int, default=100, help="the number of problems to list (every problem is still counted)")
+
+    args: argparse.Namespace = parser.parse_args(arguments)
+
+
+    if not args.database.exists():
+        sys.stderr.write(f"ERROR: {args.database} doesn't exist.\n")
+        sys.exit(2)
+
+
+    report: Report = check(args.database, args.processes)
+
+
+    for line_number, kind, text in report.issues[:args.max_issues]:
+        print(f"line {line_number}: {kind.replace('_', ' ')}: {text}")
+
+    if sum(report.counts.values()) > min(args.max_issues, len(report.issues)):
+        print(f"... and {sum(report.counts.values()) - min(args.max_issues, len(report.issues))} more")
+
+
+    print(f"\nChecked {report.line_count} lines")
+
+    for kind, count in report.counts.items():
+        if count > 0:
+            print(f"  {kind.replace('_', ' ')}: {count}")
+
+
+    if args.repair is not None:
+        print(f"Wrote {repair(args.database, args.repair, args.drop_weak_passwords)} accounts to {args.repair}")
+
+
+    sys.exit(0 if report.is_clean() else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
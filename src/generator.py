@@ -0,0 +1,337 @@
+# File name: generator.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Generates synthetic account databases for capacity planning
+"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from database import DatabaseManager
+from reshard import reshard
+from block_storage import write_segment
+from pathlib import Path
+from typing import Iterator
+import argparse
+import random
+import shutil
+import string
+import tempfile
+import os
+import sys
+
+
+# The number of rows generated by each worker task.
+# Every chunk has its own seed so the output doesn't depend on the number of processes.
+CHUNK_SIZE: int = 250_000
+
+# The number of recent usernames remembered for duplicate injection.
+DUPLICATE_POOL_SIZE: int = 1024
+
+# The storage formats the generator can write.
+STORAGE_FORMATS: tuple[str, ...] = ("flat", "sharded", "blocks")
+
+# The kinds of malformed lines which can be injected.
+MALFORMED_KINDS: tuple[str, ...] = ("missing_comma", "empty_username", "extra_field", "blank")
+
+# Characters used for usernames and passwords.
+USERNAME_CHARACTERS: str = string.ascii_lowercase + string.digits
+PASSWORD_SYMBOLS: str = string.punctuation.replace(",", "")
+PASSWORD_CHARACTERS: str = string.ascii_letters + string.digits + PASSWORD_SYMBOLS
+
+
+class GeneratorOptions:
+    def __init__(self, count: int, seed: int = 0, length_distribution: str = "uniform:4:16",
+                 duplicate_rate: float = 0.0, malformed_rate: float = 0.0) -> None:
+        # The total number of lines to write
+        self.count: int = count
+        self.seed: int = seed
+
+        # How username lengths are picked, e.g. "uniform:4:16", "normal:10:3" or "fixed:8"
+        self.length_distribution: str = length_distribution
+        self.length_sampler: tuple = parse_length_distribution(length_distribution)
+
+        # The chance of a line being a duplicate username or a malformed line.
+        self.duplicate_rate: float = duplicate_rate
+        self.malformed_rate: float = malformed_rate
+
+
+        if self.count < 0:
+            raise ValueError("The number of accounts can't be negative.")
+
+        if not 0 <= self.duplicate_rate <= 1 or not 0 <= self.malformed_rate <= 1:
+            raise ValueError("The duplicate and malformed rates must be between 0 and 1.")
+
+
+# Parse a username length distribution.
+def parse_length_distribution(spec: str) -> tuple:
+    """Parses a length distribution such as "uniform:4:16", "normal:10:3" or "fixed:8"."""
+
+    parts: list[str] = spec.split(":")
+    sampler: tuple | None = None
+
+
+    try:
+        if parts[0] == "fixed" and len(parts) == 2:
+            sampler = ("fixed", int(parts[1]), int(parts[1]))
+
+        elif parts[0] == "uniform" and len(parts) == 3:
+            sampler = ("uniform", int(parts[1]), int(parts[2]))
+
+        elif parts[0] == "normal" and len(parts) == 3:
+            sampler = ("normal", float(parts[1]), float(parts[2]))
+
+    except ValueError:
+        pass
+
+
+    if sampler is None:
+        raise ValueError(f"Invalid username length distribution: '{spec}'.")
+
+    if sampler[0] == "uniform" and sampler[1] > sampler[2]:
+        raise ValueError(f"The minimum username length can't be above the maximum: '{spec}'.")
+
+
+    return sampler
+
+
+# Convert a number into base 36.
+def to_base36(number: int) -> str:
+    """Converts a non-negative number into base 36 using lowercase letters and digits."""
+
+    if number == 0:
+        return "0"
+
+
+    digits: str = ""
+
+    while number > 0:
+        number, remainder = divmod(number, 36)
+        digits = (string.digits + string.ascii_lowercase)[remainder] + digits
+
+
+    return digits
+
+
+# Pick the length of a username.
+def sample_username_length(rng: random.Random, sampler: tuple) -> int:
+    """Picks a username length from the configured distribution (always at least 1)."""
+
+    kind, first, second = sampler
+
+
+    if kind == "uniform":
+        return max(1, rng.randint(first, second))
+
+    if kind == "normal":
+        return max(1, round(rng.gauss(first, second)))
+
+
+    return max(1, first)
+
+
+# Generate a unique username.
+def generate_username(rng: random.Random, index: int, length: int, suffix_width: int = 1) -> str:
+    """Generates a username of roughly the given length.
+The row index is encoded at the end, padded to suffix_width, so every username is unique without remembering the ones already written.
+The padding matters: without it "a1" + "1" and "a" + "11" would both be "a11"."""
+
+    suffix: str = to_base36(index).rjust(suffix_width, "0")
+    prefix_length: int = max(1, length - len(suffix))
+
+
+    return rng.choice(string.ascii_lowercase) + "".join(rng.choices(USERNAME_CHARACTERS, k=prefix_length - 1)) + suffix
+
+
+# Generate a password that meets the requirements.
+def generate_password(rng: random.Random) -> str:
+    """Generates a password which meets the password requirements used by AccountManager."""
+
+    characters: list[str] = [
+        rng.choice(string.ascii_lowercase),
+        rng.choice(string.ascii_uppercase),
+        rng.choice(string.digits),
+        rng.choice(PASSWORD_SYMBOLS)
+    ]
+
+    characters += rng.choices(PASSWORD_CHARACTERS, k=rng.randint(4, 12))
+    rng.shuffle(characters)
+
+
+    return "".join(characters)
+
+
+# Generate a malformed line.
+def generate_malformed_line(rng: random.Random, username: str, password: str) -> str:
+    """Generates a line which the account database can't parse properly."""
+
+    kind: str = rng.choice(MALFORMED_KINDS)
+
+
+    if kind == "missing_comma":
+        return username
+
+    if kind == "empty_username":
+        return f",{password}"
+
+    if kind == "extra_field":
+        return f"{username},{password},{generate_password(rng)}"
+
+
+    return ""
+
+
+# Generate the lines for a single chunk.
+def generate_lines(options: GeneratorOptions, chunk: int) -> Iterator[str]:
+    """Yields the lines for one chunk of the database.
+The same options and chunk number always produce the same lines."""
+
+    rng: random.Random = random.Random(f"{options.seed}:{chunk}")
+    recent_usernames: list[str] = []
+
+    start: int = chunk * CHUNK_SIZE
+    end: int = min(start + CHUNK_SIZE, options.count)
+
+    # Every row index is padded to the same width so a username's suffix can't run into its prefix.
+    suffix_width: int = len(to_base36(max(0, options.count - 1)))
+
+
+    for index in range(start, end):
+        username: str = generate_username(rng, index, sample_username_length(rng, options.length_sampler), suffix_width)
+        password: str = generate_password(rng)
+
+
+        # Inject a malformed line
+        if rng.random() < options.malformed_rate:
+            yield generate_malformed_line(rng, username, password)
+            continue
+
+
+        # Reuse a username which has already been written
+        if recent_usernames and rng.random() < options.duplicate_rate:
+            yield f"{rng.choice(recent_usernames)},{password}"
+            continue
+
+
+        # Remember a bounded number of usernames for duplicates.
+        if len(recent_usernames) < DUPLICATE_POOL_SIZE:
+            recent_usernames.append(username)
+        else:
+            recent_usernames[rng.randrange(DUPLICATE_POOL_SIZE)] = username
+
+
+        yield f"{username},{password}"
+
+
+# Write a single chunk to its own file.
+def write_chunk(options: GeneratorOptions, chunk: int, folder: str) -> str:
+    """Writes one chunk to a part file inside the folder and returns its path."""
+
+    part_path: str = os.path.join(folder, f"part-{chunk:08d}.txt")
+
+
+    with open(part_path, "w", buffering=1024 * 1024) as part:
+        for line in generate_lines(options, chunk):
+            part.write(line + "\n")
+
+
+    return part_path
+
+
+# Write a flat accounts file.
+def generate_flat(options: GeneratorOptions, output_path: Path, processes: int = 1) -> None:
+    """Writes a flat database in the same format as DatabaseManager (one "username,password" per line).
+Chunks are generated in separate processes and joined in order, so memory usage stays constant."""
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    chunk_count: int = (options.count + CHUNK_SIZE - 1) // CHUNK_SIZE
+
+
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as folder, output_path.open("wb") as output:
+        # Generate everything in this process if it isn't worth starting workers.
+        if processes <= 1 or chunk_count <= 1:
+            part_paths: Iterator[str] = (write_chunk(options, chunk, folder) for chunk in range(chunk_count))
+            join_parts(part_paths, output)
+
+        else:
+            with ProcessPoolExecutor(processes) as executor:
+                part_paths = executor.map(write_chunk, [options] * chunk_count, range(chunk_count), [folder] * chunk_count)
+                join_parts(part_paths, output)
+
+
+        # The database doesn't end with a new line.
+        if output.tell() > 0:
+            output.seek(-1, os.SEEK_END)
+            output.truncate()
+
+
+# Append part files to the output in order.
+def join_parts(part_paths: Iterator[str], output) -> None:
+    """Copies every part file into the output, deleting each part once it's copied."""
+
+    for part_path in part_paths:
+        with open(part_path, "rb") as part:
+            shutil.copyfileobj(part, output, 1024 * 1024)
+
+        os.remove(part_path)
+
+
+# Generate a database in the requested format.
+def generate(options: GeneratorOptions, output_path: Path, storage_format: str = "flat", processes: int = 1, shard_count: int = 0) -> None:
+    """Generates a synthetic database at the output path using the requested storage format."""
+
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Unsupported storage format: '{storage_format}'.")
+
+    if storage_format == "sharded" and shard_count <= 0:
+        raise ValueError("The sharded format needs a shard count above 0.")
+
+
+    generate_flat(options, output_path, processes)
+
+
+    # Split the flat file into shards in one streaming pass.
+    if storage_format == "sharded":
+        reshard(output_path, 0, shard_count)
+
+
+    # Move the flat file into a compressed segment.
+    # The segment is written straight from the lines (replacing any old one) so malformed lines are kept as generated.
+    if storage_format == "blocks":
+        with output_path.open(encoding="utf-8") as database:
+            write_segment(DatabaseManager(output_path, True, storage_format="blocks").segment_path,
+                          (line.rstrip("\n") for line in database))
+
+        output_path.unlink()
+
+
+def main(arguments: list[str] | None = None) -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Generate a synthetic account database.")
+
+    parser.add_argument("output", type=Path, help="where the database is written, e.g. data/accounts.txt")
+    parser.add_argument("-n", "--count", type=int, required=True, help="the number of lines to write")
+    parser.add_argument("--seed", type=int, default=0, help="the seed used to generate the accounts")
+    parser.add_argument("--length-distribution", default="uniform:4:16", help="uniform:MIN:MAX, normal:MEAN:STDDEV or fixed:LENGTH")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="the chance of a line reusing an existing username")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="the chance of a line being malformed")
+    parser.add_argument("--format", default="flat", choices=STORAGE_FORMATS, help="the storage format to write")
+    parser.add_argument("--shards", type=int, default=0, help="the number of shards used by the sharded format")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="the number of worker processes")
+
+    args: argparse.Namespace = parser.parse_args(arguments)
+
+
+    try:
+        options: GeneratorOptions = GeneratorOptions(args.count, args.seed, args.length_distribution,
+                                                     args.duplicate_rate, args.malformed_rate)
+
+        generate(options, args.output, args.format, args.processes, args.shards)
+
+    except ValueError as err:
+        sys.stderr.write("ERROR: " + str(err) + "\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
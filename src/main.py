@@ -7,6 +7,9 @@
 """
 
 from user_interface import UserInterface, clear_console
+from audit import AuditLog
+from throttle import LoginThrottle
+from tenant import TenantPool
 from pathlib import Path
 import sys
 
@@ -14,22 +17,62 @@ import sys
 # The location pointing to the database.
 database_path: Path = Path("data/accounts.txt")
 
+# The number of files the accounts are split across (0 keeps them in a single file).
+shard_count: int = 0
+
+# How the accounts are stored ("flat" or "blocks").
+storage_format: str = "flat"
+
+# Where logins, registrations and list access are recorded.
+audit_path: Path = Path("data/audit.jsonl")
+
+# Where failed login attempts are saved so they survive restarts.
+throttle_path: Path = Path("data/throttle.json")
+
+# The folder other login realms are stored in (None to only use the default database).
+realms_path: Path | None = Path("data/realms")
+
 
 class App:
     # Setup everything before continuing
-    def __init__(self, path: Path, break_upon_error: bool = False) -> None:
+    def __init__(self, path: Path, break_upon_error: bool = False, shard_count: int = 0, storage_format: str = "flat",
+                 audit_path: Path | None = None, throttle_path: Path | None = None, realms_path: Path | None = None) -> None:
         # Settings
         self.path = path
         self.break_upon_error = break_upon_error
+        self.shard_count = shard_count
+        self.storage_format = storage_format
+
+
+        # Authentication events are written in the background (if enabled).
+        self.audit_log: AuditLog | None = AuditLog(audit_path) if audit_path is not None else None
+
+        # Repeated failed logins are rejected in memory, and saved every so often (if a path is provided).
+        self.throttle: LoginThrottle = LoginThrottle(persist_path=throttle_path)
+
+
+        # Realms are opened when switched to, and the least recently used are closed when memory runs low (if enabled).
+        self.tenant_pool: TenantPool | None = None
+
+        if realms_path is not None:
+            self.tenant_pool = TenantPool(realms_path, break_upon_error=self.break_upon_error, shard_count=self.shard_count,
+                                          storage_format=self.storage_format, audit_log=self.audit_log, throttle=self.throttle)
 
 
         # The main user interface.
-        self.ui: UserInterface = UserInterface(self.path, self.break_upon_error, self.quit)
+        self.ui: UserInterface = UserInterface(self.path, self.break_upon_error, self.quit, self.shard_count, self.storage_format, self.audit_log, self.throttle, self.tenant_pool)
 
 
     # Close and exit the program.
     def quit(self) -> None:
         """Exits the program"""
+
+        # Make sure every audit event is written before exiting.
+        if self.audit_log is not None:
+            self.audit_log.close()
+
+        self.throttle.close()
+
         clear_console()
         sys.exit()
 
@@ -57,5 +100,5 @@ class App:
 
 
 if __name__ == "__main__":
-    app: App = App(database_path)
+    app: App = App(database_path, shard_count=shard_count, storage_format=storage_format, audit_path=audit_path, throttle_path=throttle_path, realms_path=realms_path)
     app.run()
\ No newline at end of file
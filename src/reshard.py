@@ -0,0 +1,114 @@
+# File name: reshard.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Redistributes an account database across a different number of shards
+"""
+
+
+from database import shard_index, shard_paths
+from pathlib import Path
+from typing import Iterator
+import argparse
+import os
+import sys
+
+
+# Read every line from a database.
+def iter_lines(database_path: Path, shard_count: int) -> Iterator[str]:
+    """Yields every non-empty line from the database one at a time.
+Malformed lines are kept so resharding never loses data."""
+
+    for path in shard_paths(database_path, shard_count):
+        if not path.exists():
+            continue
+
+
+        with path.open() as database:
+            for line in database:
+                line = line.rstrip("\r\n")
+
+                if len(line.strip()) > 0:
+                    yield line
+
+
+# Move the accounts into a different number of shards.
+def reshard(database_path: Path, old_shard_count: int, new_shard_count: int) -> int:
+    """Redistributes the database from old_shard_count to new_shard_count shards in one streaming pass.
+A shard count of 0 means a single unsharded file.
+The new shards are written to temporary files first, so the old ones are only replaced once everything has been copied.
+Returns the number of lines moved."""
+
+    old_paths: list[Path] = shard_paths(database_path, old_shard_count)
+    new_paths: list[Path] = shard_paths(database_path, new_shard_count)
+    temporary_paths: list[Path] = [path.with_name(path.name + ".reshard") for path in new_paths]
+
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+
+
+    # Every new shard is kept open while streaming through the old ones.
+    shards: list = [path.open("w") for path in temporary_paths]
+    line_count: int = 0
+
+    # Whether anything has been written to each new shard yet.
+    # Kept here because tell() on a text file flushes it, costing a write for every line.
+    shard_started: list[bool] = [False] * len(shards)
+
+
+    try:
+        for line in iter_lines(database_path, old_shard_count):
+            index: int = shard_index(line.split(",")[0], new_shard_count)
+
+            # Don't start the file with a new line.
+            shards[index].write(("\n" if shard_started[index] else "") + line)
+            shard_started[index] = True
+            line_count += 1
+
+    except BaseException:
+        for shard in shards:
+            shard.close()
+
+        for path in temporary_paths:
+            path.unlink(missing_ok=True)
+
+        raise
+
+
+    for shard in shards:
+        shard.close()
+
+
+    # Swap the old shards with the new ones.
+    for path in old_paths:
+        if path not in new_paths and path.exists():
+            os.remove(path)
+
+    for temporary_path, path in zip(temporary_paths, new_paths):
+        os.replace(temporary_path, path)
+
+
+    return line_count
+
+
+def main(arguments: list[str] | None = None) -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Redistribute an account database across a different number of shards.")
+
+    parser.add_argument("database", type=Path, help="the location of the database, e.g. data/accounts.txt")
+    parser.add_argument("--from-shards", type=int, default=0, help="the current number of shards (0 for a single file)")
+    parser.add_argument("--to-shards", type=int, required=True, help="the new number of shards (0 for a single file)")
+
+    args: argparse.Namespace = parser.parse_args(arguments)
+
+
+    if args.from_shards < 0 or args.to_shards < 0:
+        sys.stderr.write("ERROR: The number of shards can't be negative.\n")
+        sys.exit(1)
+
+
+    line_count: int = reshard(args.database, args.from_shards, args.to_shards)
+    print(f"Moved {line_count} lines into {max(1, args.to_shards)} file(s).")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,142 @@
+# File name: tenant.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Keeps the databases of many login realms open without running out of memory
+"""
+
+
+from account import AccountManager
+from audit import AuditLog
+from database import DatabaseManager
+from throttle import LoginThrottle
+from collections import OrderedDict
+from pathlib import Path
+import string
+import threading
+
+
+# Characters allowed inside a realm name.
+REALM_CHARACTERS: str = string.ascii_letters + string.digits + "-_"
+
+
+class InvalidRealmError(Exception):
+    pass
+
+
+class TenantPool:
+    def __init__(self, realms_path: Path, max_memory: int = 256 * 1024 * 1024, max_tenants: int = 1000,
+                 break_upon_error: bool = False, shard_count: int = 0, storage_format: str = "flat",
+                 audit_log: AuditLog | None = None, throttle: LoginThrottle | None = None) -> None:
+        # The folder every realm is stored in (e.g. data/realms/<name>/accounts.txt)
+        self.realms_path: Path = realms_path
+
+
+        # The least recently used realms are closed once the open ones use more than max_memory bytes
+        # or there are more than max_tenants of them.
+        self.max_memory: int = max_memory
+        self.max_tenants: int = max_tenants
+
+
+        # Settings shared by every realm
+        self.break_upon_error: bool = break_upon_error
+        self.shard_count: int = shard_count
+        self.storage_format: str = storage_format
+        self.audit_log: AuditLog | None = audit_log
+        self.throttle: LoginThrottle | None = throttle
+
+
+        # Open account managers by database path, least recently used first.
+        self.__tenants__: OrderedDict[Path, AccountManager] = OrderedDict()
+
+        # The account logged in to each closed database, so closing one only frees memory and never logs anyone out.
+        self.__logins__: dict[Path, str] = {}
+        self.__lock__: threading.Lock = threading.Lock()
+
+
+    # Get the number of open realms.
+    def __len__(self) -> int:
+        return len(self.__tenants__)
+
+
+    # Get the location of a realm's database.
+    def realm_path(self, realm: str) -> Path:
+        """Returns the database path of a realm, e.g. data/realms/<realm>/accounts.txt.
+Only letters, numbers, dashes and underscores are allowed so a realm can't point outside the realms folder."""
+
+        if len(realm) <= 0 or any(character not in REALM_CHARACTERS for character in realm):
+            raise InvalidRealmError("Realm names can only contain letters, numbers, dashes and underscores.")
+
+
+        return self.realms_path / realm / "accounts.txt"
+
+
+    # Get the account manager for a database.
+    def get(self, database_path: Path, realm: str = "") -> AccountManager:
+        """Returns the account manager for a database, opening it if it isn't already open.
+Realms that are already open keep their snapshot and index, so switching back to them doesn't reload anything."""
+
+        with self.__lock__:
+            account_manager: AccountManager | None = self.__tenants__.get(database_path)
+
+
+            if account_manager is None:
+                db_manager: DatabaseManager = DatabaseManager(database_path, self.break_upon_error, self.shard_count, self.storage_format)
+
+                account_manager = AccountManager(db_manager, self.break_upon_error, self.audit_log, self.throttle, realm=realm)
+                account_manager.current_account = self.__logins__.pop(database_path, "")
+                self.__tenants__[database_path] = account_manager
+
+
+            self.__tenants__.move_to_end(database_path)
+            self.__evict_cold_tenants__()
+
+
+            return account_manager
+
+
+    # Get the account manager for a realm.
+    def get_realm(self, realm: str) -> AccountManager:
+        return self.get(self.realm_path(realm), realm)
+
+
+    # Close a database.
+    def evict(self, database_path: Path) -> None:
+        """Forgets a database. Its memory is freed once nothing else is using it.
+The account logged in to it is kept and restored when it's opened again."""
+
+        with self.__lock__:
+            account_manager: AccountManager | None = self.__tenants__.pop(database_path, None)
+
+            if account_manager is not None:
+                self.__remember_login__(database_path, account_manager)
+
+
+    # Estimate the memory used by every open database.
+    def memory_usage(self) -> int:
+        with self.__lock__:
+            return sum(account_manager.db_manager.memory_usage() for account_manager in self.__tenants__.values())
+
+
+    # Keep the login of a database that is being closed.
+    def __remember_login__(self, database_path: Path, account_manager: AccountManager) -> None:
+        """Must be called while holding the lock."""
+
+        if account_manager.current_account:
+            self.__logins__[database_path] = account_manager.current_account
+
+
+    # Close the least recently used databases.
+    def __evict_cold_tenants__(self) -> None:
+        """Closes the least recently used databases until the pool fits its limits.
+The most recently used database is always kept open. Must be called while holding the lock."""
+
+        memory: int = sum(account_manager.db_manager.memory_usage() for account_manager in self.__tenants__.values())
+
+
+        while len(self.__tenants__) > 1 and (len(self.__tenants__) > self.max_tenants or memory > self.max_memory):
+            database_path, account_manager = self.__tenants__.popitem(last=False)
+            memory -= account_manager.db_manager.memory_usage()
+
+            self.__remember_login__(database_path, account_manager)
\ No newline at end of file
@@ -0,0 +1,250 @@
+# File name: throttle.py
+# Written by: Gelos Team on 19/10/2026
+
+
+"""
+    Description: Slows down repeated failed logins without touching the database
+"""
+
+
+from collections import OrderedDict
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+
+# Get where the login is coming from.
+def default_source() -> str:
+    """Returns the address of the SSH client if the program is being used remotely, otherwise "local"."""
+
+    ssh_client: str = os.environ.get("SSH_CLIENT", "").strip()
+
+
+    return ssh_client.split()[0] if ssh_client else "local"
+
+
+class TokenBucket:
+    # There can be a lot of these, so avoid a __dict__ for each one.
+    __slots__ = ("tokens", "updated")
+
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens: float = tokens
+        self.updated: float = updated
+
+
+class LoginThrottle:
+    def __init__(self, capacity: float = 5, refill_rate: float = 1 / 30, max_entries: int = 100_000,
+                 persist_path: Path | None = None, persist_interval: float = 60.0) -> None:
+        # Every username and source can fail `capacity` times in a row, then gets another attempt every 1 / refill_rate seconds.
+        self.capacity: float = capacity
+        self.refill_rate: float = refill_rate
+
+
+        # The least recently used buckets are forgotten once there are more than max_entries.
+        self.max_entries: int = max_entries
+
+
+        # Where the buckets are saved every persist_interval seconds (if provided).
+        self.persist_path: Path | None = persist_path
+        self.persist_interval: float = persist_interval
+
+
+        if capacity < 1 or refill_rate <= 0 or max_entries <= 0:
+            raise ValueError("The capacity must be at least 1 and the refill rate and maximum entries must be above 0.")
+
+
+        # Buckets by ("username" or "source", name). Usernames inside a realm are named (realm, username).
+        self.__buckets__: OrderedDict[tuple[str, str | tuple[str, str]], TokenBucket] = OrderedDict()
+        self.__lock__: threading.Lock = threading.Lock()
+        self.__changed__: bool = False
+        self.__stop__: threading.Event = threading.Event()
+        self.__persister__: threading.Thread | None = None
+
+
+        if self.persist_path is not None:
+            self.load()
+
+            self.__persister__ = threading.Thread(target=self.__run__, name="throttle-persister", daemon=True)
+            self.__persister__.start()
+
+
+    # Work out how many tokens a bucket has right now.
+    def __tokens__(self, key: tuple[str, str | tuple[str, str]], now: float) -> float:
+        """Returns the tokens left in a bucket. Must be called while holding the lock."""
+
+        bucket: TokenBucket | None = self.__buckets__.get(key)
+
+        if bucket is None:
+            return self.capacity
+
+
+        return min(self.capacity, bucket.tokens + (now - bucket.updated) * self.refill_rate)
+
+
+    # Check if a login attempt is allowed.
+    def allow(self, username: str | tuple[str, str] | None = None, source: str | None = None) -> bool:
+        """Checks if the username and the source both have an attempt left.
+Only looks at memory, so rejecting an attempt never touches the disk."""
+
+        now: float = time.time()
+
+
+        with self.__lock__:
+            if username is not None and self.__tokens__(("username", username), now) < 1:
+                return False
+
+            if source is not None and self.__tokens__(("source", source), now) < 1:
+                return False
+
+
+        return True
+
+
+    # Get how long until the next attempt is allowed.
+    def retry_after(self, username: str | tuple[str, str] | None = None, source: str | None = None) -> float:
+        """Returns the number of seconds until both the username and source have an attempt left."""
+
+        now: float = time.time()
+        wait: float = 0.0
+
+
+        with self.__lock__:
+            for key in (("username", username), ("source", source)):
+                if key[1] is not None:
+                    wait = max(wait, (1 - self.__tokens__(key, now)) / self.refill_rate)
+
+
+        return wait
+
+
+    # Use up an attempt after a failed login.
+    def record_failure(self, username: str | tuple[str, str] | None = None, source: str | None = None) -> None:
+        """Takes a token from the username's and the source's buckets."""
+
+        now: float = time.time()
+
+
+        with self.__lock__:
+            for key in (("username", username), ("source", source)):
+                if key[1] is None:
+                    continue
+
+
+                tokens: float = self.__tokens__(key, now)
+                bucket: TokenBucket | None = self.__buckets__.get(key)
+
+                if bucket is None:
+                    bucket = self.__buckets__[key] = TokenBucket(tokens, now)
+
+
+                bucket.tokens = max(0.0, tokens - 1)
+                bucket.updated = now
+                self.__buckets__.move_to_end(key)
+
+
+            # Forget the least recently used buckets.
+            while len(self.__buckets__) > self.max_entries:
+                self.__buckets__.popitem(last=False)
+
+
+            self.__changed__ = True
+
+
+    # Forget the failed attempts after a successful login.
+    def record_success(self, username: str | tuple[str, str] | None = None, source: str | None = None) -> None:
+        """Refills the username's bucket. The source's bucket is left alone so one valid account can't be used to reset it."""
+
+        with self.__lock__:
+            if self.__buckets__.pop(("username", username), None) is not None:
+                self.__changed__ = True
+
+
+    # Save the buckets to the disk.
+    def save(self) -> None:
+        """Writes every bucket to the persist path (written to a temporary file first)."""
+
+        if self.persist_path is None:
+            return
+
+
+        with self.__lock__:
+            entries: list = [[kind, name, bucket.tokens, bucket.updated] for (kind, name), bucket in self.__buckets__.items()]
+            self.__changed__ = False
+
+
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path: Path = self.persist_path.with_name(self.persist_path.name + ".tmp")
+
+        with temporary_path.open("w") as persist_file:
+            json.dump(entries, persist_file)
+
+        os.replace(temporary_path, self.persist_path)
+
+
+    # Load the buckets from the disk.
+    def load(self) -> None:
+        """Reads the buckets saved at the persist path, skipping it if it's missing or unreadable."""
+
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+
+
+        try:
+            with self.persist_path.open() as persist_file:
+                entries: list = json.load(persist_file)
+
+        except (OSError, ValueError):
+            return
+
+
+        if not isinstance(entries, list):
+            return
+
+
+        with self.__lock__:
+            for entry in entries[-self.max_entries:]:
+                # Skip anything that doesn't look like a saved bucket.
+                try:
+                    kind, name, tokens, updated = entry
+
+                    # JSON turns (realm, username) names into lists.
+                    if isinstance(name, list):
+                        name = tuple(name)
+
+                    # Names are a string or a tuple of strings.
+                    if kind not in ("username", "source") or not all(isinstance(part, str) for part in (name if isinstance(name, tuple) else (name,))):
+                        continue
+
+                    self.__buckets__[(kind, name)] = TokenBucket(float(tokens), float(updated))
+
+                except (TypeError, ValueError):
+                    continue
+
+
+    # Save the buckets every so often.
+    def __run__(self) -> None:
+        while not self.__stop__.wait(self.persist_interval):
+            if self.__changed__:
+                try:
+                    self.save()
+
+                except OSError:
+                    continue
+
+
+    # Stop saving in the background.
+    def close(self) -> None:
+        """Stops the background thread and saves the buckets one last time."""
+
+        if self.__persister__ is None:
+            return
+
+
+        self.__stop__.set()
+        self.__persister__.join()
+        self.__persister__ = None
+
+        self.save()
\ No newline at end of file
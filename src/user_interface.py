@@ -9,6 +9,9 @@
 
 from pathlib import Path
 from database import DatabaseManager
+from audit import AuditLog
+from throttle import LoginThrottle
+from tenant import TenantPool, InvalidRealmError
 from account import AccountManager, InvalidCredentialsError, LoginError, AccountCreationError, LoginCancelled, AccountCreationCancelled
 from typing import Callable
 import string
@@ -80,9 +83,21 @@ def clear_console() -> None:
 
 # The main user interface
 class UserInterface:
-    def __init__(self, database_path: Path, break_upon_error: bool = False, quit_command: Callable = sys.exit) -> None:
+    def __init__(self, database_path: Path, break_upon_error: bool = False, quit_command: Callable = sys.exit, shard_count: int = 0, storage_format: str = "flat",
+                 audit_log: AuditLog | None = None, throttle: LoginThrottle | None = None, tenant_pool: TenantPool | None = None) -> None:
+        # The default database
+        self.database_path: Path = database_path
+
+        # Keeps the databases of other login realms open (if provided).
+        self.tenant_pool: TenantPool | None = tenant_pool
+        self.realm: str = ""
+
+
         # For logging in, account registration, checking if the user is logged in and viewing the list of accounts.
-        self.account_manager: AccountManager = AccountManager(DatabaseManager(database_path, break_upon_error), break_upon_error)
+        if self.tenant_pool is not None:
+            self.account_manager: AccountManager = self.tenant_pool.get(database_path)
+        else:
+            self.account_manager = AccountManager(DatabaseManager(database_path, break_upon_error, shard_count, storage_format), break_upon_error, audit_log, throttle)
 
         # The list of menu options
         self.menu_options: list[MenuOption] = []
@@ -183,13 +198,45 @@ Sometimes, certain options are visible if logged in."""
         self.add_menu_option("Login", "login", "1", self.account_manager.login, 1)
         self.add_menu_option("Register", "register", "2", self.account_manager.register_account, 2)
         self.add_menu_option("View list of accounts", "list", "3", self.account_manager.view_list, 3)
-        self.add_menu_option("Quit", "quit", "q", self.quit_command, 4)
+
+        if self.tenant_pool is not None:
+            self.add_menu_option("Switch realm", "realm", "r", self.switch_realm, 4)
+
+        self.add_menu_option("Quit", "quit", "q", self.quit_command, 5)
+
+
+    # Switch to a different login realm.
+    def switch_realm(self) -> None:
+        """Prompts the user for a realm and switches to its database.
+Realms which have been used recently are still open, so switching back to them is instant."""
+
+        if self.tenant_pool is None:
+            return
+
+
+        realm: str = input("Enter a realm to switch to (leave empty for the default): ").strip()
+
+
+        # Open the realm before changing anything in case the name isn't valid.
+        if len(realm) <= 0:
+            account_manager: AccountManager = self.tenant_pool.get(self.database_path)
+        else:
+            account_manager = self.tenant_pool.get_realm(realm)
+
+
+        self.account_manager = account_manager
+        self.realm = realm
+
+
+        # The options are added again (in the same order) using the new realm.
+        for id in ("login", "register", "list", "realm", "quit"):
+            self.remove_menu_option(id)
             
 
     # Output the heading of the program.
     def __display_header__(self) -> None:
         print(f"""Gelos Account Login
-{f"Currently logged in as: {self.account_manager.current_account}" if self.account_manager.is_logged_in() else ""}
+{f"Realm: {self.realm if self.realm else "default"}\n" if self.tenant_pool is not None else ""}{f"Currently logged in as: {self.account_manager.current_account}" if self.account_manager.is_logged_in() else ""}
 """)
 
 
@@ -299,6 +346,11 @@ Sometimes, certain options are visible if logged in."""
                 continue
 
 
+            except InvalidRealmError as err:
+                message = str(err)
+                continue
+
+
             except AccountCreationCancelled:
                 message = "Account creation cancelled."
                 continue